@@ -0,0 +1,312 @@
+"""AdminAI - samostatný démon připomenutí bez GUI.
+
+Připomenutí z adminai.db doručuje i tehdy, když okno AdminAI neběží: nenačítá Tk,
+matplotlib ani model, spí až do nejbližšího termínu a probudí ho datagram od GUI
+(nové nebo změněné připomenutí) nebo pravidelná kontrola (změny ze synchronizace).
+Zabere jednotky MB paměti.
+
+Připomenutí se "vybírají" podmíněným UPDATE, takže když běží démon i GUI zároveň,
+každé připomenutí doručí právě jeden z nich.
+
+Příklady:
+    python adminai_reminders.py
+    python adminai_reminders.py --notify desktop,email
+    python adminai_reminders.py --once          # jen doručit splatná a skončit (cron)
+    python adminai_reminders.py --profile jnovak   # profil v profily/jnovak
+"""
+import sqlite3
+import sched
+import argparse
+import functools
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_WAKE_SOCKET = "/tmp/adminai_reminders.sock"
+PROFILES_DIR = "profily"
+RECHECK_INTERVAL = 300
+RETRY_INTERVAL = 60
+NOTIFY_TITLE = "AdminAI - připomenutí"
+
+
+@functools.lru_cache(maxsize=512)
+def parse_recurrence(rule, dtstart_ts):
+    """Zpracování RRULE; objekt rrule si sám cachuje už vygenerované výskyty"""
+    from dateutil.rrule import rrulestr
+
+    return rrulestr(rule, dtstart=datetime.fromtimestamp(dtstart_ts), cache=True)
+
+
+def iter_recurrence(rule, dtstart_ts, window_start, window_end):
+    """Líné rozvinutí výskytů pravidla v okně [window_start, window_end) jako epoch sekundy"""
+    for occurrence in parse_recurrence(rule, dtstart_ts).xafter(datetime.fromtimestamp(window_start), inc=True):
+        occurrence_ts = int(occurrence.timestamp())
+        if occurrence_ts >= window_end:
+            return
+        yield occurrence_ts
+
+
+def claim_due_reminders(db, now_ts):
+    """Splatná připomenutí (jednorázová i výskyty opakování) jako seznam (text, převzetí)
+
+    Každé připomenutí se označí podmíněným UPDATE - vrátí se jen ta, která tento proces
+    opravdu převzal. Převzetí lze při neúspěšném doručení vrátit release_reminder().
+    Commit je na volajícím.
+    """
+    messages = []
+    for reminder_id, message in db.execute("SELECT id, message FROM reminders WHERE is_completed = 0 AND due_ts <= ?",
+                                           (now_ts,)).fetchall():
+        if db.execute("UPDATE reminders SET is_completed = 1 WHERE id = ? AND is_completed = 0", (reminder_id,)).rowcount:
+            messages.append((message, ("reminder", reminder_id, 0, 1)))
+
+    # Opakování - rozvíjí se jen úsek od posledního spuštění do teď
+    for recurrence_id, rule, dtstart, payload, last_fired_ts in db.execute(
+            "SELECT id, rule, dtstart, payload, last_fired_ts FROM recurrences WHERE kind = 'reminder' AND last_fired_ts < ?",
+            (now_ts,)).fetchall():
+        if not db.execute("UPDATE recurrences SET last_fired_ts = ? WHERE id = ? AND last_fired_ts = ?",
+                          (now_ts, recurrence_id, last_fired_ts)).rowcount:
+            continue
+        skipped = {row[0] for row in db.execute(
+            "SELECT occurrence_ts FROM recurrence_exceptions WHERE recurrence_id = ? AND occurrence_ts > ? AND occurrence_ts <= ?",
+            (recurrence_id, last_fired_ts, now_ts)).fetchall()}
+        due = [occurrence_ts for occurrence_ts in iter_recurrence(rule, dtstart, last_fired_ts + 1, now_ts + 1)
+               if occurrence_ts not in skipped]
+        if due:
+            missed = f" (zmeškáno {len(due)}×)" if len(due) > 1 else ""
+            messages.append((json.loads(payload)["message"] + missed, ("recurrence", recurrence_id, last_fired_ts, now_ts)))
+    return messages
+
+
+def release_reminder(db, claim):
+    """Vrácení převzatého připomenutí, které se nepodařilo doručit - převezme ho příští pokus nebo GUI"""
+    kind, row_id, previous, claimed = claim
+    if kind == "reminder":
+        db.execute("UPDATE reminders SET is_completed = ? WHERE id = ? AND is_completed = ?", (previous, row_id, claimed))
+    else:
+        db.execute("UPDATE recurrences SET last_fired_ts = ? WHERE id = ? AND last_fired_ts = ?", (previous, row_id, claimed))
+
+
+def next_due_ts(db):
+    """Čas nejbližšího nedoručeného připomenutí (epoch) nebo None"""
+    candidates = [db.execute("SELECT MIN(due_ts) FROM reminders WHERE is_completed = 0").fetchone()[0]]
+    for recurrence_id, rule, dtstart, last_fired_ts in db.execute(
+            "SELECT id, rule, dtstart, last_fired_ts FROM recurrences WHERE kind = 'reminder'").fetchall():
+        skipped = {row[0] for row in db.execute(
+            "SELECT occurrence_ts FROM recurrence_exceptions WHERE recurrence_id = ? AND occurrence_ts > ?",
+            (recurrence_id, last_fired_ts)).fetchall()}
+        for occurrence_ts in iter_recurrence(rule, dtstart, last_fired_ts + 1, 2 ** 40):
+            if occurrence_ts not in skipped:
+                candidates.append(occurrence_ts)
+                break
+    candidates = [ts for ts in candidates if ts is not None]
+    return min(candidates) if candidates else None
+
+
+def wake_socket_path(profile=None):
+    """Socket pro probuzení - každý profil má vlastní, aby se démoni uživatelů nepřebíjeli"""
+    return DEFAULT_WAKE_SOCKET.replace(".sock", f"-{profile}.sock") if profile else DEFAULT_WAKE_SOCKET
+
+
+def wake_reminder_daemon(socket_path=DEFAULT_WAKE_SOCKET):
+    """Probuzení démona po změně připomenutí; bez běžícího démona nic nedělá"""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"wake", socket_path)
+    except OSError:
+        pass
+
+
+def desktop_notifier(message):
+    """Systémové oznámení (notify-send na Linuxu, osascript na macOS)"""
+    import subprocess
+
+    if sys.platform == "darwin":
+        command = ["osascript", "-e", f"display notification {json.dumps(message)} with title {json.dumps(NOTIFY_TITLE)}"]
+    else:
+        command = ["notify-send", "-a", "AdminAI", NOTIFY_TITLE, message]
+    subprocess.run(command, check=True, timeout=10, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def email_notifier(config):
+    """Odeslání připomenutí e-mailem přes SMTP z konfigurace AdminAI"""
+    def send(message):
+        import smtplib
+        from email.mime.text import MIMEText
+
+        msg = MIMEText(message, "plain", "utf-8")
+        msg["From"] = config["email_username"]
+        msg["To"] = config.get("reminder_email_to") or config["email_username"]
+        msg["Subject"] = f"{NOTIFY_TITLE}: {message[:60]}"
+        with smtplib.SMTP(config["email_server"], config["email_port"], timeout=30) as server:
+            server.starttls()
+            server.login(config["email_username"], config["email_password"])
+            server.send_message(msg)
+    return send
+
+
+class ReminderDaemon:
+    """Plánovač připomenutí nad sched.scheduler
+
+    Čekání plánovače (delayfunc) je select() na datagramovém socketu: datagram nebo
+    uplynutí `recheck` sekund vede k novému naplánování podle databáze.
+    """
+
+    def __init__(self, db_path, notifiers, socket_path=DEFAULT_WAKE_SOCKET, recheck=RECHECK_INTERVAL):
+        self.db = sqlite3.connect(db_path, timeout=30)
+        self.notifiers = notifiers
+        self.recheck = recheck
+        self.socket_path = socket_path
+        self.sock = None
+        self.scheduler = sched.scheduler(time.time, self.wait)
+        self.event = None
+        self.retry_after = 0
+
+    def open_socket(self):
+        if not hasattr(socket, "AF_UNIX"):
+            logging.warning("Unix sockety nejsou k dispozici, změny se projeví při pravidelné kontrole")
+            return
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.socket_path)
+
+    def wait(self, timeout):
+        if self.sock is None:
+            time.sleep(timeout)
+            return
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if readable:
+            # Vyprázdnění fronty - víc změn najednou stačí zpracovat jednou
+            self.sock.setblocking(False)
+            try:
+                while True:
+                    self.sock.recv(64)
+            except BlockingIOError:
+                pass
+            finally:
+                self.sock.setblocking(True)
+            logging.info("Změna připomenutí, přeplánovávám")
+            self.schedule()
+
+    def schedule(self):
+        """Jediná naplánovaná událost - nejbližší termín, nejpozději za `recheck` sekund"""
+        if self.event is not None and self.event in self.scheduler.queue:
+            self.scheduler.cancel(self.event)
+        wake_at = time.time() + self.recheck
+        due = next_due_ts(self.db)
+        if due is not None and due < wake_at:
+            # Vrácená (nedoručená) připomenutí jsou splatná hned - další pokus až po RETRY_INTERVAL
+            wake_at = max(due, self.retry_after)
+        self.event = self.scheduler.enterabs(wake_at, 0, self.fire)
+
+    def fire(self):
+        self.event = None
+        self.deliver()
+        self.schedule()
+
+    def deliver(self):
+        """Doručení všech splatných připomenutí; vrací počet opravdu doručených
+
+        Připomenutí, které nedoručil žádný ze způsobů, se vrátí do databáze.
+        """
+        claims = claim_due_reminders(self.db, int(time.time()))
+        self.db.commit()
+        delivered = 0
+        for message, claim in claims:
+            sent = False
+            for notify in self.notifiers:
+                try:
+                    notify(message)
+                    sent = True
+                except Exception as e:
+                    logging.error(f"Doručení připomenutí selhalo ({getattr(notify, '__name__', notify)}): {e}")
+            if sent:
+                logging.info(f"Připomenutí: {message}")
+                delivered += 1
+            else:
+                logging.warning(f"Připomenutí se nepodařilo doručit, zůstává nevyřízené: {message}")
+                release_reminder(self.db, claim)
+        self.db.commit()
+        if delivered < len(claims):
+            self.retry_after = time.time() + RETRY_INTERVAL
+        return delivered
+
+    def run(self):
+        self.open_socket()
+        try:
+            self.deliver()
+            self.schedule()
+            self.scheduler.run()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        self.db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AdminAI - démon připomenutí bez GUI")
+    parser.add_argument("--profile", default=os.environ.get("ADMINAI_PROFILE"), help="profil uživatele (výchozí $ADMINAI_PROFILE)")
+    parser.add_argument("--profiles-dir", default=PROFILES_DIR, help="adresář s profily")
+    parser.add_argument("--db", help="databáze AdminAI (výchozí adminai.db profilu)")
+    parser.add_argument("--config", help="konfigurace AdminAI - SMTP, socket (výchozí adminai_config.json profilu)")
+    parser.add_argument("--notify", default="desktop", help="způsoby doručení oddělené čárkou: desktop, email, stdout")
+    parser.add_argument("--socket", help="datagramový socket pro probuzení (výchozí z konfigurace)")
+    parser.add_argument("--recheck", type=int, default=RECHECK_INTERVAL, help="pravidelná kontrola databáze v sekundách")
+    parser.add_argument("--once", action="store_true", help="doručit splatná připomenutí a skončit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    folder = os.path.join(args.profiles_dir, args.profile) if args.profile else ""
+    args.db = args.db or os.path.join(folder, "adminai.db")
+    args.config = args.config or os.path.join(folder, "adminai_config.json")
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    if not os.path.exists(args.db):
+        logging.error(f"Databáze {args.db} neexistuje - nejdřív jednou spusťte AdminAI")
+        return 1
+
+    notifiers = []
+    for method in filter(None, (method.strip() for method in args.notify.split(","))):
+        if method == "desktop":
+            notifiers.append(desktop_notifier)
+        elif method == "email":
+            notifiers.append(email_notifier(config))
+        elif method == "stdout":
+            notifiers.append(functools.partial(print, flush=True))
+        else:
+            parser.error(f"neznámý způsob doručení: {method}")
+
+    daemon = ReminderDaemon(args.db, notifiers, args.socket or config.get("reminder_daemon_socket", wake_socket_path(args.profile)),
+                            args.recheck)
+    if args.once:
+        delivered = daemon.deliver()
+        daemon.close()
+        logging.info(f"Doručeno připomenutí: {delivered}")
+        return 0
+    # SIGTERM (systemd, kill) ukončí démona stejně jako Ctrl+C - socket se po sobě uklidí
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""Benchmarky horkých cest AdminAI.
+
+Samostatný spouštěč bez připojení k internetu: místo DistilGPT-2 používá
+malý GPT-2 s náhodnými vahami a byte-level tokenizer bez BPE sloučení.
+Výsledky zapisuje jako JSON a umí je porovnat s uloženou baseline.
+
+Příklady:
+    python benchmarks/bench_adminai.py --output bench.json
+    python benchmarks/bench_adminai.py --save-baseline
+    python benchmarks/bench_adminai.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# max_length používané v aplikaci (FB příspěvek, e-mail, obsah na web)
+GENERATION_LENGTHS = [100, 200, 300]
+ROUTING_COMMANDS = [
+    "ahoj",
+    "co můžeš udělat",
+    "jak se máš",
+    "statistiky",
+    "jaké mám schůzky dnes",
+    "tohle je neznámý příkaz",
+]
+# Byte-level tokenizer nemá sloučení, proto krátký prompt (jinak by přesáhl max_length=100)
+PROMPT = "Napiš příspěvek na FB o produktu Kávovar."
+
+
+def measure(func, repeat, warmup=1):
+    """Změří dobu běhu funkce a vrátí souhrnné statistiky v sekundách"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "p95": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "repeat": repeat,
+    }
+
+
+def build_tiny_tokenizer(workdir):
+    """Vytvoří byte-level GPT-2 tokenizer bez sloučení (funguje offline)"""
+    from transformers import GPT2TokenizerFast
+
+    # Stejné mapování bajtů na znaky jako GPT-2 (bytes_to_unicode)
+    printable = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    extra = [b for b in range(256) if b not in printable]
+    chars = [chr(b) for b in printable] + [chr(256 + i) for i in range(len(extra))]
+    vocab = {ch: i for i, ch in enumerate(chars)}
+    vocab["<|endoftext|>"] = len(vocab)
+    vocab_file = os.path.join(workdir, "vocab.json")
+    merges_file = os.path.join(workdir, "merges.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    with open(merges_file, "w", encoding="utf-8") as f:
+        f.write("#version: 0.2\n")
+    return GPT2TokenizerFast(vocab_file, merges_file)
+
+
+def build_tiny_model(vocab_size):
+    """Malý GPT-2 s náhodnými vahami a stejným rozhraním jako distilgpt2"""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=vocab_size, n_positions=512, n_embd=64,
+                        n_layer=2, n_head=2, bos_token_id=vocab_size - 1,
+                        eos_token_id=vocab_size - 1)
+    return GPT2LMHeadModel(config)
+
+
+def create_root(use_mock_tk):
+    """Vytvoří kořenové okno Tk - skutečné (případně na virtuálním displeji) nebo mock"""
+    display = None
+    if not use_mock_tk and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        try:
+            from pyvirtualdisplay import Display
+            display = Display(visible=False, size=(1024, 768))
+            display.start()
+        except Exception:
+            use_mock_tk = True
+    if use_mock_tk:
+        return mock.MagicMock(), display, True
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    return root, display, False
+
+
+class Harness:
+    """Spustí AdminAI v dočasném adresáři s malým modelem"""
+
+    def __init__(self, use_mock_tk=False):
+        self.workdir = tempfile.mkdtemp(prefix="adminai-bench-")
+        self.cwd = os.getcwd()
+        os.chdir(self.workdir)
+        sys.path.insert(0, REPO_ROOT)
+        import AdminAI as adminai_module
+
+        self.module = adminai_module
+        self.tokenizer = build_tiny_tokenizer(self.workdir)
+        self.model = build_tiny_model(len(self.tokenizer))
+        self.root, self.display, self.mocked_tk = create_root(use_mock_tk)
+        self.patches = [
+            mock.patch.object(adminai_module.GPT2TokenizerFast, "from_pretrained", return_value=self.tokenizer),
+            mock.patch.object(adminai_module, "load_language_model", return_value=self.model),
+        ]
+        if self.mocked_tk:
+            for name in ("tk", "ttk", "messagebox", "filedialog"):
+                self.patches.append(mock.patch.object(adminai_module, name, mock.MagicMock()))
+        for patch in self.patches:
+            patch.start()
+
+    def create_app(self):
+        return self.module.AdminAI(self.root)
+
+    def close(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        if not self.mocked_tk:
+            self.root.destroy()
+        if self.display is not None:
+            self.display.stop()
+        os.chdir(self.cwd)
+
+
+def seed_database(conn, rows):
+    """Naplní databázi syntetickými úkoly a schůzkami (textové i epoch sloupce)"""
+    rng = random.Random(rows)
+    base = datetime(2025, 1, 1)
+    priorities = ["vysoká", "střední", "nízká"]
+
+    def task(i):
+        deadline = base + timedelta(days=rng.randrange(730))
+        return (f"Úkol {i}", deadline.strftime("%Y-%m-%d"), int(deadline.timestamp()),
+                rng.choice(priorities), rng.choice(["pending", "done"]), "")
+
+    def meeting(i):
+        start = base + timedelta(days=rng.randrange(730), hours=rng.randrange(8, 18), minutes=rng.choice([0, 30]))
+        return (start.strftime("%Y-%m-%d"), start.strftime("%H:%M"), int(start.timestamp()),
+                int(start.timestamp()) + 3600, f"Účastník {i}", "Praha", "")
+
+    c = conn.cursor()
+    c.execute("DELETE FROM tasks")
+    c.execute("DELETE FROM meetings")
+    c.execute("DELETE FROM reminders")
+    c.executemany(
+        "INSERT INTO tasks (task, deadline, deadline_ts, priority, status, notes) VALUES (?, ?, ?, ?, ?, ?)",
+        (task(i) for i in range(rows)))
+    c.executemany(
+        "INSERT INTO meetings (date, time, start_ts, end_ts, participants, location, notes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (meeting(i) for i in range(rows)))
+    conn.commit()
+
+
+def seed_reminders(conn, rows):
+    """Vloží čekající připomenutí, která ještě nejsou splatná"""
+    future = datetime.now().replace(second=0, microsecond=0) + timedelta(days=365)
+    conn.execute("DELETE FROM reminders")
+    conn.executemany(
+        "INSERT INTO reminders (message, due_datetime, due_ts) VALUES (?, ?, ?)",
+        ((f"Připomenutí {i}", (future + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M"),
+          int((future + timedelta(minutes=i)).timestamp()))
+         for i in range(rows)))
+    conn.commit()
+
+
+def bench_generation(app, repeat):
+    results = {}
+    generated = []
+    original_generate = app.model.generate
+
+    def counting_generate(input_ids, *args, **kwargs):
+        output = original_generate(input_ids, *args, **kwargs)
+        generated.append(output.shape[-1] - input_ids.shape[-1])
+        return output
+
+    app.model.generate = counting_generate
+    try:
+        for max_length in GENERATION_LENGTHS:
+            generated.clear()
+            stats = measure(lambda: app.generate_text(PROMPT, max_length=max_length), repeat)
+            tokens = sum(generated) / max(len(generated), 1)
+            stats["tokens_per_s"] = tokens / stats["median"] if stats["median"] else 0.0
+            results[f"generate_text[max_length={max_length}]"] = stats
+    finally:
+        app.model.generate = original_generate
+    return results
+
+
+def bench_routing(app, repeat):
+    results = {}
+    with mock.patch.object(app.entry, "get") as entry_get:
+        for command in ROUTING_COMMANDS:
+            entry_get.return_value = command
+            results[f"process_command[{command}]"] = measure(app.process_command, repeat)
+    return results
+
+
+def bench_autocomplete(app, sizes, repeat):
+    """Dotazy našeptávání nad indexem s `rows` naučenými příkazy (jeden dotaz = jeden stisk klávesy)"""
+    results = {}
+    rng = random.Random(0)
+    for rows in sizes:
+        for i in range(rows):
+            app.completions.add(f"{rng.choice(ROUTING_COMMANDS)} {i}", rng.randint(1, 50))
+        for prefix in ("v", "co m", "naplanuj"):
+            results[f"autocomplete[{prefix},{rows}]"] = measure(lambda: app.completions.suggest(prefix), repeat)
+    return results
+
+
+def bench_lists(app, sizes, repeat):
+    results = {}
+    for rows in sizes:
+        seed_database(app.conn, rows)
+        results[f"refresh_task_list[{rows}]"] = measure(app.render_task_list, repeat)
+        results[f"refresh_meeting_list[{rows}]"] = measure(app.render_meeting_list, repeat)
+        for item_type in ("task", "meeting"):
+            # show_items jen označí seznam k obnově - překreslí ho až flush (v aplikaci after_idle)
+            results[f"show_items[{item_type},{rows}]"] = measure(lambda: (app.show_items(item_type), app.renderer.flush()), repeat)
+    return results
+
+
+def bench_reminders(app, sizes, repeat):
+    results = {}
+    for rows in sizes:
+        seed_reminders(app.conn, rows)
+        with mock.patch.object(app.root, "after"):
+            results[f"check_reminders[{rows}]"] = measure(app.check_reminders, repeat)
+    return results
+
+
+def bench_pdf(app, repeat):
+    text = app.generate_text(PROMPT, max_length=300)
+    path = os.path.join(os.getcwd(), "bench.pdf")
+    return {"export_to_pdf": measure(lambda: app.export_to_pdf(path, text), repeat)}
+
+
+def run(args):
+    random.seed(0)
+    harness = Harness(use_mock_tk=args.mock_tk)
+    try:
+        startup = measure(lambda: harness.create_app().conn.close(), args.startup_repeat, warmup=0)
+        app = harness.create_app()
+        results = {"startup": startup}
+        results.update(bench_generation(app, args.repeat))
+        results.update(bench_routing(app, args.repeat))
+        results.update(bench_autocomplete(app, args.sizes, args.repeat))
+        results.update(bench_lists(app, args.sizes, args.repeat))
+        results.update(bench_reminders(app, args.sizes, args.repeat))
+        results.update(bench_pdf(app, args.repeat))
+        app.conn.close()
+    finally:
+        harness.close()
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "mock_tk": harness.mocked_tk,
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Vrátí seznam regresí - medián horší než baseline o více než tolerance"""
+    regressions = []
+    for name, stats in report["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference.get("median"):
+            continue
+        ratio = stats["median"] / reference["median"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, reference["median"], stats["median"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarky horkých cest AdminAI")
+    parser.add_argument("--output", help="soubor pro JSON výsledky (jinak stdout)")
+    parser.add_argument("--baseline", help="JSON baseline pro porovnání")
+    parser.add_argument("--save-baseline", action="store_true", help="uložit výsledky jako novou baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="povolené zpomalení (0.2 = 20 %%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--startup-repeat", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--mock-tk", action="store_true", help="nepoužívat skutečné Tk (bez displeje)")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w", encoding="utf-8") as f:
+            f.write(payload)
+        print(f"Baseline uložena do {DEFAULT_BASELINE}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESE {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Benchmark synchronizace pošty proti lokální náhradě IMAP serveru.
+
+StandInImapServer je minimální IMAP4rev1 server v paměti (LOGIN, ENABLE CONDSTORE,
+SELECT/EXAMINE, UID FETCH včetně CHANGEDSINCE, UID SEARCH, LOGOUT). Zprávy generuje
+deterministicky z UID, takže i schránka se 100 000 zprávami zabere jen pár MB.
+
+Měří první synchronizaci hlaviček, inkrementální synchronizaci po změnách (nové zprávy,
+změněné příznaky, smazané zprávy), líné stažení těla a špičku paměti (tracemalloc).
+
+Příklady:
+    python benchmarks/bench_imap_sync.py --mock-tk
+    python benchmarks/bench_imap_sync.py --mock-tk --messages 100000 --no-condstore
+"""
+import argparse
+import bisect
+import json
+import os
+import platform
+import re
+import socketserver
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_adminai import Harness  # noqa: E402
+
+
+class Mailbox:
+    """Schránka v paměti - UID, příznaky a MODSEQ; obsah zprávy se generuje z UID"""
+
+    def __init__(self, count, uidvalidity=1):
+        self.uidvalidity = uidvalidity
+        self.uids = list(range(1, count + 1))
+        self.flags = {}
+        self.modseqs = {}
+        self.highest_modseq = 1
+        self.lock = threading.Lock()
+
+    @property
+    def uidnext(self):
+        return (self.uids[-1] if self.uids else 0) + 1
+
+    def append(self, count):
+        with self.lock:
+            start = self.uidnext
+            self.uids.extend(range(start, start + count))
+
+    def set_flags(self, uid, flags):
+        with self.lock:
+            self.highest_modseq += 1
+            self.flags[uid] = flags
+            self.modseqs[uid] = self.highest_modseq
+
+    def expunge(self, uid):
+        with self.lock:
+            index = bisect.bisect_left(self.uids, uid)
+            if index < len(self.uids) and self.uids[index] == uid:
+                del self.uids[index]
+                self.flags.pop(uid, None)
+                self.modseqs.pop(uid, None)
+
+    def headers(self, uid):
+        return (f"From: Odesilatel {uid % 97} <odesilatel{uid % 97}@example.cz>\r\n"
+                f"To: jan.novak@example.com\r\n"
+                f"Subject: =?utf-8?b?UMWZw61sb2hh?= zprava {uid}\r\n"
+                f"Message-ID: <{uid}@example.cz>\r\n\r\n").encode("utf-8")
+
+    def message(self, uid):
+        body = f"Dobrý den,\r\nposílám zprávu číslo {uid}.\r\n\r\nS pozdravem\r\nOdesílatel\r\n"
+        return (self.headers(uid)[:-2] + b"Content-Type: text/plain; charset=utf-8\r\n"
+                b"Content-Transfer-Encoding: 8bit\r\n\r\n" + body.encode("utf-8"))
+
+
+def parse_uid_set(text, uidnext):
+    """IMAP množina UID (1:5,7,9:*) jako seznam rozsahů (od, do)"""
+    ranges = []
+    for part in text.split(","):
+        low, _, high = part.partition(":")
+        low = uidnext - 1 if low == "*" else int(low)
+        high = low if not high else (uidnext - 1 if high == "*" else int(high))
+        ranges.append((min(low, high), max(low, high)))
+    return ranges
+
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    CAPABILITIES = "IMAP4rev1 ENABLE UIDPLUS"
+
+    def send(self, line):
+        self.wfile.write(line.encode("utf-8") + b"\r\n")
+
+    def handle(self):
+        mailbox = self.server.mailbox
+        condstore = self.server.condstore
+        capabilities = self.CAPABILITIES + (" CONDSTORE" if condstore else "")
+        self.send(f"* OK [CAPABILITY {capabilities}] AdminAI IMAP stand-in")
+        for raw in self.rfile:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            tag, _, rest = line.partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            if command == "UID":
+                command, _, args = args.partition(" ")
+                command = "UID " + command.upper()
+            if command == "CAPABILITY":
+                self.send(f"* CAPABILITY {capabilities}")
+            elif command in ("LOGIN", "NOOP", "ENABLE"):
+                if command == "ENABLE" and condstore:
+                    self.send("* ENABLED CONDSTORE")
+            elif command in ("SELECT", "EXAMINE"):
+                self.send(f"* {len(mailbox.uids)} EXISTS")
+                self.send("* 0 RECENT")
+                self.send("* FLAGS (\\Seen \\Answered \\Flagged \\Deleted \\Draft)")
+                self.send(f"* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid")
+                self.send(f"* OK [UIDNEXT {mailbox.uidnext}] Predicted next UID")
+                if condstore:
+                    self.send(f"* OK [HIGHESTMODSEQ {mailbox.highest_modseq}] Highest")
+            elif command == "UID SEARCH":
+                self.uid_search(mailbox, args)
+            elif command == "UID FETCH":
+                self.uid_fetch(mailbox, args)
+            elif command == "LOGOUT":
+                self.send("* BYE logging out")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self.send(f"{tag} BAD unknown command")
+                continue
+            self.send(f"{tag} OK {command} completed")
+            self.wfile.flush()
+
+    def matching(self, mailbox, uid_set):
+        for low, high in parse_uid_set(uid_set, mailbox.uidnext):
+            start = bisect.bisect_left(mailbox.uids, low)
+            end = bisect.bisect_right(mailbox.uids, high)
+            for index in range(start, end):
+                yield index + 1, mailbox.uids[index]
+
+    def uid_search(self, mailbox, args):
+        uid_set = "1:*" if args.upper() == "ALL" else args.split()[-1]
+        self.send("* SEARCH " + " ".join(str(uid) for _, uid in self.matching(mailbox, uid_set)))
+
+    def uid_fetch(self, mailbox, args):
+        uid_set, _, items = args.partition(" ")
+        changed = re.search(r"CHANGEDSINCE (\d+)", items)
+        changedsince = int(changed.group(1)) if changed else None
+        for sequence, uid in self.matching(mailbox, uid_set):
+            modseq = mailbox.modseqs.get(uid, 1)
+            if changedsince is not None and modseq <= changedsince:
+                continue
+            parts = [f"UID {uid}"]
+            if "FLAGS" in items:
+                parts.append(f"FLAGS ({mailbox.flags.get(uid, '')})")
+            if "RFC822.SIZE" in items:
+                parts.append(f"RFC822.SIZE {len(mailbox.message(uid))}")
+            if "INTERNALDATE" in items:
+                parts.append(f'INTERNALDATE "{time.strftime("%d-%b-%Y %H:%M:%S +0000", time.gmtime(1_700_000_000 + uid * 60))}"')
+            if changedsince is not None or self.server.condstore and "MODSEQ" in items:
+                parts.append(f"MODSEQ ({modseq})")
+            literal = None
+            if "HEADER.FIELDS" in items:
+                literal = ("BODY[HEADER.FIELDS (FROM TO SUBJECT DATE MESSAGE-ID)]", mailbox.headers(uid))
+            elif "BODY.PEEK[]" in items:
+                literal = ("BODY[]", mailbox.message(uid))
+            if literal:
+                self.wfile.write(f"* {sequence} FETCH ({' '.join(parts)} {literal[0]} {{{len(literal[1])}}}\r\n".encode("utf-8"))
+                self.wfile.write(literal[1] + b")\r\n")
+            else:
+                self.send(f"* {sequence} FETCH ({' '.join(parts)})")
+
+
+class StandInImapServer(socketserver.ThreadingTCPServer):
+    """Lokální náhrada IMAP serveru pro benchmarky a ruční zkoušky synchronizace"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox, condstore=True):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.mailbox = mailbox
+        self.condstore = condstore
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def run(args):
+    mailbox = Mailbox(args.messages)
+    server = StandInImapServer(mailbox, condstore=not args.no_condstore)
+    harness = Harness(use_mock_tk=args.mock_tk)
+    try:
+        module = harness.module
+        app = harness.create_app()
+        connect = module.imap_connector("127.0.0.1", server.port, False, "bench", "bench")
+        engine = module.ImapSync(connect, app.db_path, args.batch_size)
+        engine.open()
+        results = {}
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = engine.sync_mailbox("INBOX")
+        results["initial_sync"] = {"seconds": time.perf_counter() - start, **stats,
+                                   "messages_per_s": stats["new"] / (time.perf_counter() - start),
+                                   "peak_memory_mb": tracemalloc.get_traced_memory()[1] / 2 ** 20}
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        stats = engine.sync_mailbox("INBOX")
+        results["noop_sync"] = {"seconds": time.perf_counter() - start, **stats}
+
+        mailbox.append(args.changes)
+        for uid in range(1, args.changes * 5, 5):
+            mailbox.set_flags(uid, "\\Seen")
+        for uid in range(2, args.changes, 7):
+            mailbox.expunge(uid)
+        start = time.perf_counter()
+        stats = engine.sync_mailbox("INBOX")
+        results["incremental_sync"] = {"seconds": time.perf_counter() - start, **stats}
+
+        local = engine.db.execute("SELECT COUNT(*) FROM emails WHERE mailbox = 'INBOX'").fetchone()[0]
+        email_id = engine.db.execute("SELECT id FROM emails ORDER BY uid DESC LIMIT 1").fetchone()[0]
+        start = time.perf_counter()
+        body = engine.fetch_body(email_id)
+        results["fetch_body"] = {"seconds": time.perf_counter() - start, "chars": len(body)}
+
+        engine.close()
+        app.conn.close()
+    finally:
+        harness.close()
+        server.shutdown()
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "messages": args.messages,
+        "condstore": not args.no_condstore,
+        "consistent": local == len(mailbox.uids),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark synchronizace IMAP")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=500, help="počet nových/změněných zpráv pro inkrementální kolo")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-condstore", action="store_true", help="server bez CONDSTORE (příznaky po oknech UID)")
+    parser.add_argument("--mock-tk", action="store_true", help="nepoužívat skutečné Tk (bez displeje)")
+    parser.add_argument("--output", help="soubor pro JSON výsledky (jinak stdout)")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0 if report["consistent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())